@@ -1,5 +1,6 @@
 import sys
 from datetime import date, timedelta
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, OrderBy
@@ -10,6 +11,7 @@ PROPERTY_ID = "280436820"
 OUTPUT_PATH = "reports/campaign.html"
 REPORT_TITLE = "Campaign: Weekly Engaged Sessions (Last 6 Weeks)"
 TOP_N_CAMPAIGNS = 20
+CHART_HEIGHT = 800
 
 # Define custom colors for the top 5 campaigns
 CAMPAIGN_COLORS = [
@@ -77,7 +79,7 @@ def main():
     df_for_table, df_for_chart = prepare_report_data(df, TOP_N_CAMPAIGNS)
 
     # --- Create Stacked Bar Chart with Plotly ---
-    display_columns = [ga_reporter.format_week_header(d) for d in df_for_chart.columns]
+    display_columns = ga_reporter.format_week_headers(df_for_chart.columns)
     chart_html = create_chart(df_for_chart, display_columns)
 
     # --- Generate and save the final HTML file ---
@@ -104,34 +106,43 @@ def prepare_report_data(df, top_n):
 def aggregate_campaigns(df, top_n):
     """Groups smaller campaigns into an 'Others' category."""
     most_recent_week = df.columns[0]
-    campaign_totals = df.groupby(level='Campaign')[most_recent_week].sum().sort_values(ascending=False)
+
+    # Work on the integer codes of the Campaign level so every step is one array pass
+    campaign_index = df.index.remove_unused_levels()
+    campaign_names = campaign_index.levels[0]
+    campaign_codes = campaign_index.codes[0]
+
+    campaign_totals = pd.Series(
+        np.bincount(campaign_codes, weights=df[most_recent_week], minlength=len(campaign_names)),
+        index=campaign_names,
+    ).sort_values(ascending=False)
 
     if len(campaign_totals) <= top_n:
         return df.sort_values(by=most_recent_week, ascending=False)
 
-    # Identify top N and other campaigns
+    # Identify top N campaigns; rows from any other campaign get a rank of -1
     top_campaign_names = campaign_totals.head(top_n).index
-    
-    # Filter for top campaigns
-    df_top = df[df.index.get_level_values('Campaign').isin(top_campaign_names)]
+    level_rank = np.full(len(campaign_names), -1)
+    level_rank[campaign_names.get_indexer(top_campaign_names)] = np.arange(top_n)
+    campaign_rank = level_rank[campaign_codes]
+    is_top = campaign_rank >= 0
 
-    # Filter for other campaigns to be aggregated
-    df_others = df[~df.index.get_level_values('Campaign').isin(top_campaign_names)]
-    others_sum = df_others.sum()
+    # Sum the other campaigns into a single 'Others' row
+    others_index = pd.MultiIndex.from_tuples([('Others', '')], names=df.index.names)
+    df_others = pd.DataFrame([df[~is_top].sum()], index=others_index)
 
-    # Rebuild the DataFrame with top campaigns and the 'Others' row
-    df_aggregated = df_top.copy()
-    df_aggregated.loc[('Others', ''), :] = others_sum
-
-    # Sort the DataFrame by the original campaign total order, with 'Others' at the end
-    sorted_campaign_order = top_campaign_names.tolist() + ['Others']
-    return df_aggregated.reindex(sorted_campaign_order, level='Campaign')
+    # Order the top campaigns by their total, with 'Others' at the end
+    sorted_order = np.argsort(campaign_rank[is_top], kind='stable')
+    return pd.concat([df[is_top].iloc[sorted_order], df_others])
 
 
 def create_chart(df_chart, display_columns):
     """Creates a stacked bar chart from the DataFrame."""
     fig = go.Figure()
 
+    # Merge campaigns too small to show up in the chart into 'Others'
+    df_chart = ga_reporter.fold_subpixel_rows(df_chart, 'Others', CHART_HEIGHT)
+
     # Iterate through the aggregated campaign data for the chart
     for i, campaign in enumerate(df_chart.index):
         # Truncate long campaign names for the legend, but keep the full name for hover
@@ -154,7 +165,7 @@ def create_chart(df_chart, display_columns):
 
     fig.update_layout(
         width=1080,
-        height=800,
+        height=CHART_HEIGHT,
         barmode='stack',
         xaxis_title="Week (Sunday - Saturday)",
         yaxis_title="Engaged Sessions",
@@ -168,7 +179,7 @@ def create_chart(df_chart, display_columns):
             x=1
         )
     )
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,7 @@
 import sys
 import os
 from datetime import date, timedelta
-from collections import defaultdict
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -91,33 +91,32 @@ def process_performance_data(response, excluded_values=None):
     if excluded_values is None:
         excluded_values = set()
 
-    report_data = []
+    campaigns, source_mediums, engaged_sessions, key_events = [], [], [], []
     for row in response.rows:
         campaign = row.dimension_values[0].value
         if campaign in excluded_values:
             continue
 
-        # Truncate campaign name if it's longer than 40 characters
-        if len(campaign) > 40:
-            campaign = campaign[:40] + "..."
+        campaigns.append(campaign)
+        source_mediums.append(row.dimension_values[1].value)
+        engaged_sessions.append(int(row.metric_values[0].value))
+        key_events.append(int(row.metric_values[1].value))
 
-        source_medium = row.dimension_values[1].value
-        engaged_sessions = int(row.metric_values[0].value)
-        key_events = int(row.metric_values[1].value)
-
-        report_data.append({
-            'Campaign': campaign,
-            'Source / Medium': source_medium,
-            'Engaged Sessions': engaged_sessions,
-            'Key Events': key_events
-        })
-
-    if not report_data:
+    if not campaigns:
         return pd.DataFrame()
 
-    # Convert to DataFrame and set multi-level index
-    df = pd.DataFrame(report_data)
-    df = df.set_index(['Campaign', 'Source / Medium'])
+    # Sum metrics per (campaign, source / medium) pair on the full campaign names
+    group_ids, index = pd.MultiIndex.from_arrays([campaigns, source_mediums]).factorize()
+
+    # Truncate campaign names longer than 40 characters for display
+    index = pd.MultiIndex.from_arrays(
+        [ga_reporter.truncate_labels(index.get_level_values(0), 40), index.get_level_values(1)],
+        names=['Campaign', 'Source / Medium']
+    )
+    df = pd.DataFrame({
+        'Engaged Sessions': np.bincount(group_ids, weights=engaged_sessions, minlength=len(index)).astype(np.int32),
+        'Key Events': np.bincount(group_ids, weights=key_events, minlength=len(index)).astype(np.int32),
+    }, index=index)
 
     # Calculate Key Event Rate, handle division by zero
     df['Key Event Rate'] = (df['Key Events'] / df['Engaged Sessions']).fillna(0)
@@ -189,46 +188,47 @@ def create_performance_chart(df_chart):
         tick_step = None  # Let Plotly auto-determine the tick step
     fig.update_yaxes(title_text="<b>Key Events</b>", secondary_y=True, rangemode="tozero", dtick=tick_step)
 
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 
 def generate_performance_html_report(df_for_table, chart_html, report_title, output_path, start_date, end_date):
     """Generates and saves the final HTML report file for performance data."""
-    # Format the DataFrame for the HTML table
-    df_display = df_for_table.copy()
-
     # Format numeric columns with commas and rate column as percentage
-    df_display['Engaged Sessions'] = df_display['Engaged Sessions'].apply(lambda x: f"{x:,.0f}")
-    df_display['Key Events'] = df_display['Key Events'].apply(lambda x: f"{x:,.0f}")
-    df_display['Key Event Rate'] = df_display['Key Event Rate'].apply(lambda x: f"{x:.2%}")
-
-    table_html = df_display.to_html(classes='styled-table')
+    formatters = {
+        'Engaged Sessions': '{:,.0f}'.format,
+        'Key Events': '{:,.0f}'.format,
+        'Key Event Rate': '{:.2%}'.format,
+    }
 
     # Format date range for display
     start_formatted = start_date.strftime('%B %d, %Y')
     end_formatted = end_date.strftime('%B %d, %Y')
     date_range_header = f"<h2>{start_formatted} - {end_formatted}</h2>"
 
-    html_template = f"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    ga_reporter.write_plotly_js(output_dir)
+
+    # Write the document piece by piece rather than assembling it in memory first
+    with open(output_path, "w") as f:
+        f.write(f"""
 <html>
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {ga_reporter.PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
     {date_range_header}
     {chart_html}
-    {table_html}
+    """)
+        df_for_table.to_html(buf=f, classes='styled-table', formatters=formatters)
+        f.write("""
 </body>
 </html>
-"""
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
-    with open(output_path, "w") as f:
-        f.write(html_template)
+""")
 
     print(f"Report successfully generated: {output_path}")
 
@@ -163,10 +163,7 @@ def create_core_pages_chart(df_chart):
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
     # Truncate long page paths for display on the x-axis
-    chart_labels = [
-        path if len(path) <= 50 else path[:47] + '...'
-        for path in df_chart['Page Path']
-    ]
+    chart_labels = ga_reporter.truncate_labels(df_chart['Page Path'], 50, 47)
 
     # Add Bar Chart for Engaged Sessions
     fig.add_trace(
@@ -210,28 +207,29 @@ def create_core_pages_chart(df_chart):
     # Rotate x-axis labels for better readability
     fig.update_xaxes(tickangle=45, tickfont=dict(size=10))
 
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 
 def generate_core_pages_html_report(df_for_table, chart_html, report_title, output_path, start_date, end_date):
     """Generates and saves the final HTML report file for core pages data."""
-    # Format the DataFrame for the HTML table
-    df_display = df_for_table.set_index('Page Path')
-
     # Truncate long page paths for display in the table
-    truncated_index = [
-        path if len(path) <= 60 else path[:57] + '...'
-        for path in df_display.index
-    ]
-    df_display.index = pd.Index(truncated_index, name='Page Path')
-
-    # Format numeric columns
-    df_display['Engaged Sessions'] = df_display['Engaged Sessions'].apply(lambda x: f"{x:,.0f}")
-    df_display['Sessions with Key Event'] = df_display['Sessions with Key Event'].apply(lambda x: f"{x:,.0f}")
-    df_display['Conversion Rate'] = df_display['Conversion Rate'].apply(lambda x: f"{x:.2%}")
-
-    
-    table_html = df_display.to_html(classes='styled-table')
+    truncated_index = ga_reporter.truncate_labels(df_for_table['Page Path'], 60, 57)
+    display_index = pd.Index(truncated_index, name='Page Path')
+
+    # Assemble the display table from the existing column buffers instead of copying the frame
+    df_display = pd.DataFrame({
+        'Engaged Sessions': df_for_table['Engaged Sessions'].to_numpy(),
+        'Sessions with Key Event': df_for_table['Sessions with Key Event'].to_numpy(),
+        'Conversion Rate': df_for_table['Conversion Rate'].to_numpy(),
+    }, index=display_index, copy=False)
+
+    # Format numeric columns with commas and rate column as percentage
+    formatters = {
+        'Engaged Sessions': '{:,.0f}'.format,
+        'Sessions with Key Event': '{:,.0f}'.format,
+        'Conversion Rate': '{:.2%}'.format,
+    }
+    table_html = df_display.to_html(classes='styled-table', formatters=formatters)
 
     # Format date range for display
     start_formatted = start_date.strftime('%B %d, %Y')
@@ -243,6 +241,7 @@ def generate_core_pages_html_report(df_for_table, chart_html, report_title, outp
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {ga_reporter.PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
@@ -255,6 +254,7 @@ def generate_core_pages_html_report(df_for_table, chart_html, report_title, outp
     output_dir = os.path.dirname(output_path)
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
+    ga_reporter.write_plotly_js(output_dir)
 
     with open(output_path, "w") as f:
         f.write(html_template)
@@ -1,6 +1,7 @@
 import sys
 import os
 from datetime import date, timedelta
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, OrderBy
@@ -84,25 +85,25 @@ def process_formfills_data(response, excluded_values=None):
     if excluded_values is None:
         excluded_values = set()
 
-    report_data = []
+    content_keys, channels, key_events = [], [], []
     for row in response.rows:
         content_key = row.dimension_values[0].value
         if content_key in excluded_values:
             continue
 
-        channel = row.dimension_values[1].value
-        key_events = int(row.metric_values[0].value)
+        content_keys.append(content_key)
+        channels.append(row.dimension_values[1].value)
+        key_events.append(int(row.metric_values[0].value))
 
-        report_data.append({
-            'Content Key': content_key,
-            'Channel': channel,
-            'Key Events': key_events
-        })
-
-    if not report_data:
+    if not content_keys:
         return pd.DataFrame()
 
-    df = pd.DataFrame(report_data)
+    # Build the frame from flat columns rather than a dict per row
+    df = pd.DataFrame({
+        'Content Key': content_keys,
+        'Channel': channels,
+        'Key Events': np.asarray(key_events, dtype=np.int32),
+    })
     df = df.groupby(['Content Key', 'Channel']).sum()
 
     # Sort by total key events per content key
@@ -151,31 +152,26 @@ def create_formfills_chart(df_chart):
     # Shorten long content keys on x-axis for readability
     fig.update_xaxes(tickangle=45, tickfont=dict(size=10),
                      tickvals=df_pivot.index,
-                     ticktext=[text if len(text) < 50 else text[:47] + '...' for text in df_pivot.index])
+                     ticktext=ga_reporter.truncate_labels(df_pivot.index, 49, 47))
 
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 
 def generate_formfills_html_report(df_for_table, chart_html, report_title, output_path, start_date, end_date):
     """Generates and saves the final HTML report file for form fills."""
-    # Format the DataFrame for the HTML table
-    df_display = df_for_table.copy()
-
     # Truncate long content keys for display in the table
-    original_index = df_display.index
-    truncated_keys = [
-        lp if len(lp) <= 50 else lp[:50] + '...'
-        for lp in original_index.get_level_values('Content Key')
-    ]
-    df_display.index = pd.MultiIndex.from_arrays(
+    original_index = df_for_table.index
+    truncated_keys = ga_reporter.truncate_labels(original_index.get_level_values('Content Key'), 50)
+    display_index = pd.MultiIndex.from_arrays(
         [truncated_keys, original_index.get_level_values('Channel')],
         names=original_index.names
     )
 
-    # Format numeric columns with commas
-    df_display['Key Events'] = df_display['Key Events'].apply(lambda x: f"{x:,.0f}")
+    # Reuse the existing column buffer under the display index instead of copying the frame
+    df_display = pd.DataFrame({'Key Events': df_for_table['Key Events'].to_numpy()}, index=display_index, copy=False)
 
-    table_html = df_display.to_html(classes='styled-table')
+    # Format numeric columns with commas while rendering
+    table_html = df_display.to_html(classes='styled-table', formatters={'Key Events': '{:,.0f}'.format})
 
     # Format date range for display
     start_formatted = start_date.strftime('%B %d, %Y')
@@ -187,6 +183,7 @@ def generate_formfills_html_report(df_for_table, chart_html, report_title, outpu
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {ga_reporter.PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
@@ -199,6 +196,7 @@ def generate_formfills_html_report(df_for_table, chart_html, report_title, outpu
     output_dir = os.path.dirname(output_path)
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
+    ga_reporter.write_plotly_js(output_dir)
 
     with open(output_path, "w") as f:
         f.write(html_template)
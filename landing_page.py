@@ -1,6 +1,7 @@
 import sys
 import os
 from datetime import date, timedelta
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -13,6 +14,7 @@ CUSTOM_CHANNEL_DIMENSION = "sessionCustomChannelGroup:7871560290"
 OUTPUT_PATH = "reports/landing_page.html"
 TOP_N_CHART = 15
 TOP_N_TABLE = 20
+CHART_HEIGHT = 700
 
 # Re-using colors from overview.py for consistency
 CHANNEL_COLORS = {
@@ -64,21 +66,26 @@ def main():
         sys.exit()
 
     # --- Prepare data for chart and table ---
-    # For the table, get the top N overall landing pages
-    page_totals_all = df_agg.groupby(level='Landing Page')['Engaged Sessions'].sum().sort_values(ascending=False)
-    top_table_pages = page_totals_all.head(TOP_N_TABLE).index
-    df_for_table = df_agg[df_agg.index.get_level_values('Landing Page').isin(top_table_pages)]
-
-    # For the chart, filter out '/careers' pages first
-    landing_pages = df_agg.index.get_level_values('Landing Page')
-    df_chart_source = df_agg[~landing_pages.str.startswith('/careers')]
-
-    # Then, get the top N from the filtered data for the chart
-    page_totals_chart = df_chart_source.groupby(level='Landing Page')['Engaged Sessions'].sum().sort_values(ascending=False)
-    top_chart_pages = page_totals_chart.head(TOP_N_CHART).index
-    # Filter for the top pages and reindex to ensure they are sorted by total sessions
-    df_for_chart = df_chart_source[df_chart_source.index.get_level_values('Landing Page').isin(top_chart_pages)]
-    df_for_chart = df_for_chart.reindex(top_chart_pages, level='Landing Page')
+    # Total engaged sessions per landing page, computed once for both the table and the chart
+    page_totals = df_agg.groupby(level='Landing Page', observed=True)['Engaged Sessions'].sum().sort_values(ascending=False)
+
+    # Rank pages for the table (top N overall) and the chart (top N excluding '/careers' pages)
+    table_rank = np.arange(len(page_totals))
+    chart_rank = np.full(len(page_totals), -1)
+    is_chart_page = ~page_totals.index.str.startswith('/careers')
+    chart_rank[is_chart_page] = np.arange(is_chart_page.sum())
+
+    # Look up each row's ranks through the Landing Page level codes in a single pass
+    page_index = df_agg.index.remove_unused_levels()
+    page_positions = page_totals.index.get_indexer(page_index.levels[0])[page_index.codes[0]]
+    row_table_rank = table_rank[page_positions]
+    row_chart_rank = chart_rank[page_positions]
+
+    df_for_table = df_agg[row_table_rank < TOP_N_TABLE]
+
+    # Filter for the top chart pages and order them by total sessions
+    chart_rows = np.flatnonzero((row_chart_rank >= 0) & (row_chart_rank < TOP_N_CHART))
+    df_for_chart = df_agg.iloc[chart_rows[np.argsort(row_chart_rank[chart_rows], kind='stable')]]
 
     # Define a dynamic report title
     report_title = f"Top Landing Pages by Engaged Sessions for Week Ending {end_date.strftime('%B %d, %Y')}"
@@ -95,31 +102,31 @@ def process_landing_page_data(response, excluded_values=None):
     if excluded_values is None:
         excluded_values = set()
 
-    report_data = []
+    landing_pages, channels, engaged_sessions, key_events = [], [], [], []
     for row in response.rows:
         landing_page = row.dimension_values[0].value
         if landing_page in excluded_values:
             continue
 
-        channel = row.dimension_values[1].value
-        engaged_sessions = int(row.metric_values[0].value)
-        key_events = int(row.metric_values[1].value)
-
-        report_data.append({
-            'Landing Page': landing_page,
-            'Channel': channel,
-            'Engaged Sessions': engaged_sessions,
-            'Key Events': key_events
-        })
+        landing_pages.append(landing_page)
+        channels.append(row.dimension_values[1].value)
+        engaged_sessions.append(int(row.metric_values[0].value))
+        key_events.append(int(row.metric_values[1].value))
 
-    if not report_data:
+    if not landing_pages:
         return pd.DataFrame()
 
-    df = pd.DataFrame(report_data)
-    df = df.groupby(['Landing Page', 'Channel']).sum()
+    # Build the columns with their final dtypes; categorical keys and int32 metrics keep the groupby memory-light
+    df = pd.DataFrame({
+        'Landing Page': pd.Categorical(landing_pages),
+        'Channel': pd.Categorical(channels),
+        'Engaged Sessions': np.asarray(engaged_sessions, dtype=np.int32),
+        'Key Events': np.asarray(key_events, dtype=np.int32),
+    })
+    df = df.groupby(['Landing Page', 'Channel'], observed=True).sum()
 
     # Sort by total sessions per landing page
-    df = df.reindex(df.groupby(level='Landing Page')['Engaged Sessions'].sum().sort_values(ascending=False).index, level='Landing Page')
+    df = df.reindex(df.groupby(level='Landing Page', observed=True)['Engaged Sessions'].sum().sort_values(ascending=False).index, level='Landing Page')
 
     return df
 
@@ -133,6 +140,9 @@ def create_landing_page_chart(df_chart):
     # Pivot for stacked bar chart of Engaged Sessions
     df_pivot = df_chart['Engaged Sessions'].unstack(level='Channel').fillna(0)
 
+    # Merge channels too small to show up in any bar into 'Other'
+    df_pivot = ga_reporter.fold_subpixel_rows(df_pivot.T, 'Other', CHART_HEIGHT).T
+
     # Aggregate total key events per landing page for the line chart
     df_line = df_chart.groupby(level='Landing Page')['Key Events'].sum()
     # Ensure the line data is in the same order as the bar chart data
@@ -163,7 +173,7 @@ def create_landing_page_chart(df_chart):
 
     fig.update_layout(
         width=1080,
-        height=700,
+        height=CHART_HEIGHT,
         barmode='stack',
         xaxis_title="Landing Page",
         legend_title="Metrics",
@@ -184,62 +194,67 @@ def create_landing_page_chart(df_chart):
     # Shorten landing page URLs on x-axis for readability
     fig.update_xaxes(tickangle=45, tickfont=dict(size=10),
                      tickvals=df_pivot.index,
-                     ticktext=[text if len(text) < 50 else text[:47] + '...' for text in df_pivot.index])
+                     ticktext=ga_reporter.truncate_labels(df_pivot.index, 49, 47))
 
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 
 def generate_landing_page_html_report(df_for_table, chart_html, report_title, output_path, start_date, end_date):
     """Generates and saves the final HTML report file for landing pages."""
-    # Format the DataFrame for the HTML table
-    df_display = df_for_table.copy()
-
     # Calculate Key Event Rate, handle division by zero
-    df_display['Key Event Rate'] = (df_display['Key Events'] / df_display['Engaged Sessions']).fillna(0)
+    key_event_rate = (df_for_table['Key Events'] / df_for_table['Engaged Sessions']).fillna(0)
 
     # Truncate long landing page URLs for display in the table
-    original_index = df_display.index
-    truncated_landing_pages = [
-        lp if len(lp) <= 50 else lp[:50] + '...'
-        for lp in original_index.get_level_values('Landing Page')
-    ]
-    df_display.index = pd.MultiIndex.from_arrays(
+    original_index = df_for_table.index
+    truncated_landing_pages = ga_reporter.truncate_labels(original_index.get_level_values('Landing Page'), 50)
+    display_index = pd.MultiIndex.from_arrays(
         [truncated_landing_pages, original_index.get_level_values('Channel')],
         names=original_index.names
     )
 
-    # Format numeric columns with commas
-    df_display['Engaged Sessions'] = df_display['Engaged Sessions'].apply(lambda x: f"{x:,.0f}")
-    df_display['Key Events'] = df_display['Key Events'].apply(lambda x: f"{x:,.0f}")
-    df_display['Key Event Rate'] = df_display['Key Event Rate'].apply(lambda x: f"{x:.2%}")
+    # Assemble the display table from the existing column buffers instead of copying the frame
+    df_display = pd.DataFrame({
+        'Engaged Sessions': df_for_table['Engaged Sessions'].to_numpy(),
+        'Key Events': df_for_table['Key Events'].to_numpy(),
+        'Key Event Rate': key_event_rate.to_numpy(),
+    }, index=display_index, copy=False)
 
-    table_html = df_display.to_html(classes='styled-table')
+    # Format numeric columns with commas and rate column as percentage
+    formatters = {
+        'Engaged Sessions': '{:,.0f}'.format,
+        'Key Events': '{:,.0f}'.format,
+        'Key Event Rate': '{:.2%}'.format,
+    }
 
     # Format date range for display
     start_formatted = start_date.strftime('%B %d, %Y')
     end_formatted = end_date.strftime('%B %d, %Y')
     date_range_header = f"<h2>{start_formatted} - {end_formatted}</h2>"
 
-    html_template = f"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    ga_reporter.write_plotly_js(output_dir)
+
+    # Write the document piece by piece rather than assembling it in memory first
+    with open(output_path, "w") as f:
+        f.write(f"""
 <html>
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {ga_reporter.PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
     {date_range_header}
     {chart_html}
-    {table_html}
+    """)
+        df_display.to_html(buf=f, classes='styled-table', formatters=formatters)
+        f.write("""
 </body>
 </html>
-"""
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
-    with open(output_path, "w") as f:
-        f.write(html_template)
+""")
 
     print(f"Report successfully generated: {output_path}")
 
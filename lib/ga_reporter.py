@@ -1,19 +1,104 @@
+import functools
+import hashlib
+import html
 import os
-from collections import defaultdict
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
 import pandas as pd
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import DateRange, RunReportRequest
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
+    DateRange,
+    RunReportRequest,
+    RunReportResponse,
+)
 
+# Raw GA responses are cached here so re-running a report skips the API call
+CACHE_DIR = ".cache/ga"
+# Cached responses older than this are fetched again
+CACHE_TTL_SECONDS = 60 * 60
 
+# Written once next to the reports and loaded in each report's <head>, so the browser caches a
+# single copy; charts are rendered with include_plotlyjs=False
+PLOTLY_JS_FILENAME = f"plotly-{get_plotlyjs_version()}.min.js"
+PLOTLY_JS_TAG = f'<script src="{PLOTLY_JS_FILENAME}"></script>'
+
+
+@functools.lru_cache(maxsize=1)
 def get_ga_client(credentials_path="./.env/credentials.json"):
-    """Instantiates and returns a GA4 BetaAnalyticsDataClient."""
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
-    return BetaAnalyticsDataClient()
+    """Returns a GA4 BetaAnalyticsDataClient, created once and shared so reports reuse its gRPC channel."""
+    return BetaAnalyticsDataClient.from_service_account_file(credentials_path)
+
+
+def write_plotly_js(output_dir):
+    """Writes the plotly.js bundle the reports link to into output_dir, unless it is already there."""
+    js_path = os.path.join(output_dir, PLOTLY_JS_FILENAME)
+    if os.path.exists(js_path):
+        return
+
+    # Write to a per-thread temporary file first so a report never links to a partially written bundle
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tmp_path = f"{js_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(get_plotlyjs())
+    os.replace(tmp_path, js_path)
+
+
+def _cache_path(request):
+    """Returns the on-disk cache location for a report request."""
+    digest = hashlib.blake2b(RunReportRequest.serialize(request), digest_size=16)
+    # Relative date ranges (e.g. "yesterday") resolve differently each day, so the day is part of the key
+    digest.update(date.today().isoformat().encode())
+    return os.path.join(CACHE_DIR, f"{digest.hexdigest()}.pb")
+
+
+def _read_cached_response(request):
+    """Returns the cached response for a report request, or None if it is not cached or has expired."""
+    cache_path = _cache_path(request)
+    try:
+        cached_at = os.path.getmtime(cache_path)
+    except OSError:
+        return None
+    if time.time() - cached_at > CACHE_TTL_SECONDS:
+        return None
+    with open(cache_path, "rb") as f:
+        return RunReportResponse.deserialize(f.read())
+
+
+def _prune_cache():
+    """Deletes cached responses that have expired, so the cache does not grow day after day."""
+    expired_before = time.time() - CACHE_TTL_SECONDS
+    for entry in os.scandir(CACHE_DIR):
+        if not entry.name.endswith(".pb"):
+            continue
+        try:
+            if entry.stat().st_mtime < expired_before:
+                os.remove(entry.path)
+        except FileNotFoundError:  # already removed by a report running in parallel
+            pass
+
 
+def _write_cached_response(request, response):
+    """Stores the response for a report request in the on-disk cache."""
+    cache_path = _cache_path(request)
 
-def run_ga_report(client, property_id, dimensions, metrics, order_bys, date_ranges=None, segment=None):
-    """Runs a report against the Google Analytics Data API v1."""
+    # Write to a per-thread temporary file first so a partially written response is never read back,
+    # even when reports running in parallel fetch the same request
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(RunReportResponse.serialize(response))
+    os.replace(tmp_path, cache_path)
+
+    _prune_cache()
+
+
+def build_report_request(property_id, dimensions, metrics, order_bys, date_ranges=None, segment=None):
+    """Builds a RunReportRequest for the Google Analytics Data API v1."""
     if date_ranges is None:
         date_ranges = [DateRange(start_date="42daysAgo", end_date="yesterday")]
 
@@ -27,67 +112,202 @@ def run_ga_report(client, property_id, dimensions, metrics, order_bys, date_rang
     if segment:
         request_args["segments"] = (segment,)
 
-    request = RunReportRequest(**request_args)
-    return client.run_report(request)
+    return RunReportRequest(**request_args)
+
+
+def run_ga_report(client, property_id, dimensions, metrics, order_bys, date_ranges=None, segment=None, use_cache=True):
+    """Runs a report against the Google Analytics Data API v1, reusing a cached response if available."""
+    request = build_report_request(property_id, dimensions, metrics, order_bys, date_ranges, segment)
+    if not use_cache:
+        return client.run_report(request)
+
+    response = _read_cached_response(request)
+    if response is None:
+        response = client.run_report(request)
+        _write_cached_response(request, response)
+
+    return response
+
 
+def run_ga_batch(client, property_id, requests, use_cache=True):
+    """Runs up to 5 report requests in a single batchRunReports call, returning responses in request order."""
+    responses = [_read_cached_response(request) if use_cache else None for request in requests]
 
-def process_to_weekly_df(response, key_dimension_indices, date_dimension_index, metric_index=0, excluded_values=None):
-    """Processes GA API response into a weekly pivoted DataFrame."""
+    # Only the requests without a cached response go to the API
+    missing = [i for i, response in enumerate(responses) if response is None]
+    if missing:
+        batch_request = BatchRunReportsRequest(
+            property=f"properties/{property_id}",
+            requests=[requests[i] for i in missing],
+        )
+        batch_response = client.batch_run_reports(batch_request)
+        for i, response in zip(missing, batch_response.reports):
+            responses[i] = response
+            if use_cache:
+                _write_cached_response(requests[i], response)
+
+    return responses
+
+
+def _grouped_sum(group_ids, week_ids, values, n_groups, n_weeks):
+    """Sums values into a (group, week) matrix with a single bincount over flat cell ids."""
+    cell_ids = group_ids * n_weeks + week_ids
+    out = np.bincount(cell_ids, weights=values, minlength=n_groups * n_weeks)
+    return out.astype(np.int64).reshape(n_groups, n_weeks)
+
+
+def process_to_weekly_df(response, key_dimension_indices, date_dimension_index, metric_index=0, excluded_values=None,
+                         range_start_date=None):
+    """Processes GA API response into a weekly pivoted DataFrame.
+
+    The date dimension is GA's 'date', or 'nthWeek' when range_start_date (a Sunday) is given.
+    """
     if excluded_values is None:
         excluded_values = set()
 
-    pivoted_data = defaultdict(lambda: defaultdict(int))
+    if not response.rows:
+        return pd.DataFrame()
 
-    for row in response.rows:
-        # Create a key from the specified dimension values
-        key_parts = [row.dimension_values[i].value for i in key_dimension_indices]
+    # Read the rows from the underlying protobuf message, skipping the proto-plus wrapper built on every
+    # field access, and pull every row's values out in one pass, then slice out columns
+    rows = RunReportResponse.pb(response).rows
+    dimension_values = np.array([[dv.value for dv in row.dimension_values] for row in rows], dtype=object)
+    values = np.array([row.metric_values[metric_index].value for row in rows], dtype=np.int64)
+    key_values = [dimension_values[:, i] for i in key_dimension_indices]
+    date_values = dimension_values[:, date_dimension_index]
 
-        # Skip if the first key part is in the exclusion list
-        if key_parts and key_parts[0] in excluded_values:
-            continue
+    # Skip rows whose first key part is in the exclusion list
+    if excluded_values:
+        keep = ~pd.Index(key_values[0]).isin(list(excluded_values))
+        if not keep.any():
+            return pd.DataFrame()
+        key_values = [column[keep] for column in key_values]
+        date_values = date_values[keep]
+        values = values[keep]
 
-        key = tuple(key_parts) if len(key_parts) > 1 else key_parts[0]
+    # Bucket each date into its week, with weeks starting on Sunday, as integer days since the epoch.
+    # 1970-01-01 was a Thursday, so (days since epoch + 4) % 7 is the days since Sunday.
+    # A report window only has a few dozen distinct dates, so parse those once and map back by code.
+    date_codes, unique_dates = pd.factorize(date_values)
+    if range_start_date is None:
+        days = pd.to_datetime(unique_dates, format="%Y%m%d").to_numpy().astype('datetime64[D]').view('i8')
+        week_starts = (days - (days + 4) % 7)[date_codes]
+    else:
+        # GA has already summed the rows by week; nthWeek counts whole weeks from the start of the range
+        range_start_day = np.datetime64(range_start_date, 'D').view('i8')
+        week_starts = (range_start_day + 7 * unique_dates.astype(np.int64))[date_codes]
 
-        date_str = row.dimension_values[date_dimension_index].value
-        sessions = int(row.metric_values[metric_index].value)
+    # Number each week by how many weeks it is before the most recent one, and keep
+    # the 6 most recent weeks that have data as the columns, newest first
+    latest_week_start = week_starts.max()
+    weeks_ago = (latest_week_start - week_starts) // 7
+    recent_weeks_ago = np.flatnonzero(np.bincount(weeks_ago))[:6]
+    column_of_weeks_ago = np.full(weeks_ago.max() + 1, -1)
+    column_of_weeks_ago[recent_weeks_ago] = np.arange(len(recent_weeks_ago))
+    week_ids = column_of_weeks_ago[weeks_ago]
 
-        current_date = datetime.strptime(date_str, "%Y%m%d").date()
-        days_since_sunday = (current_date.weekday() + 1) % 7
-        week_start_date = current_date - timedelta(days=days_since_sunday)
+    # Map keys to dense integer ids, then sum the recent weeks into a (key, week) matrix
+    if len(key_values) > 1:
+        keys = pd.MultiIndex.from_arrays(key_values)
+    else:
+        keys = pd.Index(key_values[0])
+    group_ids, groups = keys.factorize()
 
-        pivoted_data[key][week_start_date] += sessions
+    is_recent = week_ids >= 0
+    totals = _grouped_sum(
+        group_ids[is_recent], week_ids[is_recent], values[is_recent], len(groups), len(recent_weeks_ago)
+    )
+
+    week_columns = (latest_week_start - 7 * recent_weeks_ago).astype('datetime64[D]').astype(object)
+    # Weekly GA counts fit comfortably in int32, which halves memory traffic downstream
+    return pd.DataFrame(totals.astype(np.int32), index=groups, columns=week_columns)
 
-    df = pd.DataFrame.from_dict(pivoted_data, orient='index')
 
-    if df.empty:
+def fold_subpixel_rows(df, others_label, chart_height_px):
+    """Folds rows too small to be visible in a stacked bar chart into an 'others' row."""
+    # A segment shorter than one pixel at the chart's scale cannot be seen, so a
+    # row whose largest value is below that never renders a visible bar.
+    pixel_value = df.sum().max() / chart_height_px
+    is_small = (df.max(axis=1) < pixel_value) & (df.index != others_label)
+    if not is_small.any():
         return df
 
-    # Get the 6 most recent weeks, sort them, and filter the DataFrame
-    all_weeks = sorted(df.columns, reverse=True)
-    sorted_weeks = all_weeks[:6]
-    df = df[sorted_weeks]
+    # Add the folded rows to any existing 'others' row, which always goes last
+    is_others = df.index == others_label
+    others_sum = df[is_small | is_others].sum()
+    return pd.concat([df[~(is_small | is_others)], others_sum.to_frame(others_label).T])
 
-    return df.fillna(0).astype(int)
 
+def truncate_labels(labels, max_length, truncated_length=None):
+    """Shortens labels longer than max_length to their first truncated_length characters plus '...'."""
+    if truncated_length is None:
+        truncated_length = max_length
+    labels = pd.Series(np.asarray(labels, dtype=object))
+    truncated = labels.where(labels.str.len() <= max_length, labels.str.slice(0, truncated_length) + '...')
+    return truncated.tolist()
 
+
+@functools.lru_cache(maxsize=512)
 def format_week_header(start_date):
     """Formats a date object into a 'Mon Day - Mon Day' string."""
     end_date = start_date + timedelta(days=6)
     return f"{start_date.strftime('%b %d')} - {end_date.strftime('%b %d')}"
 
 
+def format_week_headers(start_dates):
+    """Formats a sequence of week start dates into 'Mon Day - Mon Day' strings."""
+    # Reports share the same few week columns, so each header is only formatted once per process
+    return [format_week_header(start_date) for start_date in start_dates]
+
+
+def mark_total_row(table_html):
+    """Adds the 'total-row' class to the last row of a rendered table if it is the 'Total' row."""
+    # Search backwards from the end so only the final row is touched
+    row_start = table_html.rfind('<tr>')
+    if row_start == -1:
+        return table_html
+
+    # Only tag the row when its first cell is the 'Total' label
+    row_content_start = row_start + len('<tr>')
+    first_cell_start = len(table_html) - len(table_html[row_content_start:].lstrip())
+    if not table_html.startswith('<th>Total</th>', first_cell_start):
+        return table_html
+    return f'{table_html[:row_start]}<tr class="total-row">{table_html[row_content_start:]}'
+
+
+def render_table(df, display_columns=None, total_row_key='Total'):
+    """Renders a single-index table of whole numbers as HTML, giving the total row the 'total-row' class."""
+    if display_columns is None:
+        display_columns = df.columns
+
+    # Same markup as DataFrame.to_html, built directly for this fixed schema of labelled integer rows
+    header_html = "".join(f"<th>{html.escape(str(column))}</th>" for column in display_columns)
+    row_html = []
+    for label, values in zip(df.index, df.itertuples(index=False, name=None)):
+        row_open = '<tr class="total-row">' if label == total_row_key else '<tr>'
+        cells_html = "".join(f"<td>{value:,.0f}</td>" for value in values)
+        row_html.append(f"{row_open}<th>{html.escape(str(label))}</th>{cells_html}</tr>")
+
+    return (
+        '<table border="1" class="dataframe styled-table">'
+        f'<thead><tr style="text-align: right;"><th></th>{header_html}</tr></thead>'
+        f'<tbody>{"".join(row_html)}</tbody>'
+        '</table>'
+    )
+
+
 def generate_html_report(df_for_table, chart_html, report_title, output_path, start_date=None, end_date=None):
     """Generates and saves the final HTML report file."""
-    # Format the DataFrame for the HTML table (add comma separators)
-    df_display = df_for_table.copy()
-    for col in df_display.columns:
-        df_display[col] = df_display[col].apply(lambda x: f"{x:,.0f}")
-
     # Create formatted column headers for display
-    display_columns = [format_week_header(d) for d in df_for_table.columns]
-    df_display.columns = display_columns
+    display_columns = format_week_headers(df_for_table.columns)
+    df_display = df_for_table.set_axis(display_columns, axis=1)
+
+    # Format the table cells with comma separators while rendering
+    formatters = {col: '{:,.0f}'.format for col in display_columns}
+    table_html = df_display.to_html(classes='styled-table', formatters=formatters)
 
-    table_html = df_display.to_html(classes='styled-table')
+    # Add a class to the 'Total' row for styling
+    table_html = mark_total_row(table_html)
 
     date_range_header = ""
     if start_date and end_date:
@@ -95,32 +315,29 @@ def generate_html_report(df_for_table, chart_html, report_title, output_path, st
         end_formatted = end_date.strftime('%B %d, %Y')
         date_range_header = f"<h2>{start_formatted} - {end_formatted}</h2>"
 
-    html_template = f"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    write_plotly_js(output_dir)
+
+    # Write the document piece by piece rather than assembling it in memory first
+    with open(output_path, "w") as f:
+        f.write(f"""
 <html>
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
     {date_range_header}
     {chart_html}
-    {table_html}
+    """)
+        f.write(table_html)
+        f.write("""
 </body>
 </html>
-"""
-
-    # Add a class to the 'Total' row for styling
-    html_template = html_template.replace(
-        '<tr>\n      <th>Total</th>',
-        '<tr class="total-row">\n      <th>Total</th>'
-    )
-
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
-    with open(output_path, "w") as f:
-        f.write(html_template)
+""")
 
     print(f"Report successfully generated: {output_path}")
\ No newline at end of file
@@ -40,27 +40,65 @@ def main():
                   end_date=end_date.strftime('%Y-%m-%d'))
     ]
 
+    # --- Calculate Summary Date Ranges: last week, month-to-date and quarter-to-date ---
+    summary_start_date = end_date - timedelta(days=6)
+    mtd_start_date = end_date.replace(day=1)
+
+    # Custom quarters: Feb-Apr, May-Jul, Aug-Oct, Nov-Jan
+    end_date_month = end_date.month
+    end_date_year = end_date.year
+    if end_date_month in [2, 3, 4]:
+        qtd_start_date = date(end_date_year, 2, 1)
+    elif end_date_month in [5, 6, 7]:
+        qtd_start_date = date(end_date_year, 5, 1)
+    elif end_date_month in [8, 9, 10]:
+        qtd_start_date = date(end_date_year, 8, 1)
+    elif end_date_month in [11, 12]:
+        qtd_start_date = date(end_date_year, 11, 1)
+    else:  # Month is January
+        qtd_start_date = date(end_date_year - 1, 11, 1)
+
     # Define the request parameters
+    # The date range starts on a Sunday, so GA's nthWeek buckets are exactly the Sunday - Saturday weeks
     dimensions = [
         Dimension(name=CUSTOM_CHANNEL_DIMENSION),
-        Dimension(name="date"),
+        Dimension(name="nthWeek"),
     ]
     metrics = [Metric(name="engagedSessions")]
     order_bys = [
-        OrderBy(dimension=OrderBy.DimensionOrderBy(dimension_name="date"), desc=True),
+        OrderBy(dimension=OrderBy.DimensionOrderBy(dimension_name="nthWeek"), desc=True),
         OrderBy(metric=OrderBy.MetricOrderBy(metric_name="engagedSessions"), desc=True),
     ]
+    # The user asked for "Active Sessions", which we'll interpret as "engagedSessions" for consistency.
+    summary_metrics = [
+        Metric(name="activeUsers"),
+        Metric(name="engagedSessions"),
+        Metric(name="keyEvents")
+    ]
 
-    # Run the report
-    response = ga_reporter.run_ga_report(
-        client, PROPERTY_ID, dimensions, metrics, order_bys, date_ranges=overview_date_ranges
-    )
+    requests = [
+        ga_reporter.build_report_request(
+            PROPERTY_ID, dimensions, metrics, order_bys, date_ranges=overview_date_ranges
+        ),
+    ]
+    for summary_start in (summary_start_date, mtd_start_date, qtd_start_date):
+        summary_date_ranges = [
+            DateRange(start_date=summary_start.strftime('%Y-%m-%d'),
+                      end_date=end_date.strftime('%Y-%m-%d'))
+        ]
+        requests.append(ga_reporter.build_report_request(
+            PROPERTY_ID, dimensions=[], metrics=summary_metrics, order_bys=[], date_ranges=summary_date_ranges
+        ))
+
+    # Run the weekly report and the three summaries in a single batch request
+    response, summary_response, mtd_response, qtd_response = ga_reporter.run_ga_batch(client, PROPERTY_ID, requests)
 
     # Process data into a weekly DataFrame
     df = ga_reporter.process_to_weekly_df(
         response,
         key_dimension_indices=[0],
-        date_dimension_index=1
+        date_dimension_index=1,
+        range_start_date=start_date
     )
 
     if df.empty:
@@ -72,106 +110,24 @@ def main():
     most_recent_week = df.columns[0]
     df = df.sort_values(by=most_recent_week, ascending=False)
 
-    # Create a separate DataFrame for the table with a 'Total' row
-    df_for_table = df.copy()
-    df_for_table.loc['Total'] = df_for_table.sum()
+    # Create a separate DataFrame for the table with a 'Total' row, keeping the integer dtype
+    totals = df.sum().to_frame('Total').T.astype(df.dtypes.iloc[0])
+    df_for_table = pd.concat([df, totals])
 
     # --- Create Stacked Bar Chart with Plotly ---
-    display_columns = [ga_reporter.format_week_header(d) for d in df.columns]
+    display_columns = ga_reporter.format_week_headers(df.columns)
     chart_html = create_chart(df, display_columns)
 
-    # --- Fetch Summary Metrics for the last week ---
-    summary_start_date = end_date - timedelta(days=6)
-    summary_date_ranges = [
-        DateRange(start_date=summary_start_date.strftime('%Y-%m-%d'),
-                  end_date=end_date.strftime('%Y-%m-%d'))
-    ]
-    summary_metrics = [
-        Metric(name="activeUsers"),
-        Metric(name="engagedSessions"),
-        Metric(name="keyEvents")
-    ]
-
-    summary_response = ga_reporter.run_ga_report(
-        client,
-        PROPERTY_ID,
-        dimensions=[],
-        metrics=summary_metrics,
-        order_bys=[],
-        date_ranges=summary_date_ranges
-    )
-
-    summary_stats = {"active_users": 0, "engaged_sessions": 0, "key_events": 0}
-    if summary_response.rows:
-        summary_stats["active_users"] = int(summary_response.rows[0].metric_values[0].value)
-        summary_stats["engaged_sessions"] = int(summary_response.rows[0].metric_values[1].value)
-        summary_stats["key_events"] = int(summary_response.rows[0].metric_values[2].value)
-
-    # --- Fetch MTD Summary Metrics ---
-    mtd_start_date = end_date.replace(day=1)
-    mtd_date_ranges = [
-        DateRange(start_date=mtd_start_date.strftime('%Y-%m-%d'),
-                  end_date=end_date.strftime('%Y-%m-%d'))
-    ]
-    # The user asked for "Active Sessions", which we'll interpret as "engagedSessions" for consistency.
-    mtd_metrics = [
-        Metric(name="activeUsers"),
-        Metric(name="engagedSessions"),
-        Metric(name="keyEvents")
-    ]
-
-    mtd_response = ga_reporter.run_ga_report(
-        client,
-        PROPERTY_ID,
-        dimensions=[],
-        metrics=mtd_metrics,
-        order_bys=[],
-        date_ranges=mtd_date_ranges
-    )
-
-    summary_stats["mtd_active_users"] = 0
-    summary_stats["mtd_engaged_sessions"] = 0
-    summary_stats["mtd_key_events"] = 0
-    if mtd_response.rows:
-        summary_stats["mtd_active_users"] = int(mtd_response.rows[0].metric_values[0].value)
-        summary_stats["mtd_engaged_sessions"] = int(mtd_response.rows[0].metric_values[1].value)
-        summary_stats["mtd_key_events"] = int(mtd_response.rows[0].metric_values[2].value)
-
-    # --- Fetch QTD Summary Metrics ---
-    # Custom quarters: Feb-Apr, May-Jul, Aug-Oct, Nov-Jan
-    end_date_month = end_date.month
-    end_date_year = end_date.year
-    if end_date_month in [2, 3, 4]:
-        qtd_start_date = date(end_date_year, 2, 1)
-    elif end_date_month in [5, 6, 7]:
-        qtd_start_date = date(end_date_year, 5, 1)
-    elif end_date_month in [8, 9, 10]:
-        qtd_start_date = date(end_date_year, 8, 1)
-    elif end_date_month in [11, 12]:
-        qtd_start_date = date(end_date_year, 11, 1)
-    else:  # Month is January
-        qtd_start_date = date(end_date_year - 1, 11, 1)
-
-    qtd_date_ranges = [
-        DateRange(start_date=qtd_start_date.strftime('%Y-%m-%d'),
-                  end_date=end_date.strftime('%Y-%m-%d'))
-    ]
-    qtd_metrics = [
-        Metric(name="activeUsers"),
-        Metric(name="engagedSessions"),
-        Metric(name="keyEvents")
-    ]
-    qtd_response = ga_reporter.run_ga_report(
-        client, PROPERTY_ID, [], qtd_metrics, [], date_ranges=qtd_date_ranges
-    )
-
-    summary_stats["qtd_active_users"] = 0
-    summary_stats["qtd_engaged_sessions"] = 0
-    summary_stats["qtd_key_events"] = 0
-    if qtd_response.rows:
-        summary_stats["qtd_active_users"] = int(qtd_response.rows[0].metric_values[0].value)
-        summary_stats["qtd_engaged_sessions"] = int(qtd_response.rows[0].metric_values[1].value)
-        summary_stats["qtd_key_events"] = int(qtd_response.rows[0].metric_values[2].value)
+    # --- Summary Metrics for the last week, MTD and QTD ---
+    summary_stats = {}
+    for prefix, stats_response in (("", summary_response), ("mtd_", mtd_response), ("qtd_", qtd_response)):
+        summary_stats[f"{prefix}active_users"] = 0
+        summary_stats[f"{prefix}engaged_sessions"] = 0
+        summary_stats[f"{prefix}key_events"] = 0
+        if stats_response.rows:
+            summary_stats[f"{prefix}active_users"] = int(stats_response.rows[0].metric_values[0].value)
+            summary_stats[f"{prefix}engaged_sessions"] = int(stats_response.rows[0].metric_values[1].value)
+            summary_stats[f"{prefix}key_events"] = int(stats_response.rows[0].metric_values[2].value)
 
     # --- Generate and save the final HTML file ---
     generate_overview_html_report(
@@ -208,25 +164,14 @@ def create_chart(df_chart, display_columns):
             x=0
         )
     )
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 
 def generate_overview_html_report(df_for_table, chart_html, report_title, output_path, start_date, end_date, summary_stats):
     """Generates and saves the final HTML report file for the overview."""
-    # Format the DataFrame for the HTML table (add comma separators)
-    df_display = df_for_table.copy()
-    for col in df_display.columns:
-        df_display[col] = df_display[col].apply(lambda x: f"{x:,.0f}")
-
-    # Create formatted column headers for display
-    display_columns = [ga_reporter.format_week_header(d) for d in df_for_table.columns]
-    df_display.columns = display_columns
-
-    table_html = df_display.to_html(classes='styled-table')
-    table_html = table_html.replace(
-        '<tr>\n      <th>Total</th>',
-        '<tr class="total-row">\n      <th>Total</th>'
-    )
+    # Render the table with formatted week headers and the 'Total' row marked for styling
+    display_columns = ga_reporter.format_week_headers(df_for_table.columns)
+    table_html = ga_reporter.render_table(df_for_table, display_columns)
 
     date_range_header = ""
     if start_date and end_date:
@@ -259,27 +204,31 @@ def generate_overview_html_report(df_for_table, chart_html, report_title, output
     </div>
     """
 
-    html_template = f"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    ga_reporter.write_plotly_js(output_dir)
+
+    # Write the document piece by piece rather than assembling it in memory first
+    with open(output_path, "w") as f:
+        f.write(f"""
 <html>
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {ga_reporter.PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
     {date_range_header}
     {chart_html}
-    {table_html}
-    {summary_html}
+    """)
+        f.write(table_html)
+        f.write(summary_html)
+        f.write("""
 </body>
 </html>
-"""
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
-    with open(output_path, "w") as f:
-        f.write(html_template)
+""")
 
     print(f"Report successfully generated: {output_path}")
 
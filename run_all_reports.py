@@ -1,4 +1,5 @@
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import the main functions from your report scripts
 import overview
@@ -7,61 +8,59 @@ import campaign_performance
 import landing_page
 import weekly_conversions
 import formfills
+from lib import ga_reporter
+
+# (label, module) pairs for every report generated by run_all()
+REPORTS = [
+    ("overview", overview),
+    ("weekly campaign", campaign),
+    ("campaign performance", campaign_performance),
+    ("landing page", landing_page),
+    ("form fills", formfills),
+    ("weekly conversions", weekly_conversions),
+]
+
 
 def run_all():
     """
-    Runs all the report generation scripts sequentially.
+    Runs all the report generation scripts concurrently.
     """
     start_time = time.time()
     print("Starting all report generation tasks...")
     print("-" * 40)
 
-    # --- Generate Overview Report (GA) ---
-    print("\n[1/6] Generating Overview Report (GA)...")
-    try:
-        overview.main()
-    except Exception as e:
-        print(f"  -> ERROR: Failed to generate overview report: {e}")
-
-    # --- Generate Weekly Campaign Report (GA) ---
-    print("\n[2/6] Generating Weekly Campaign Report (GA)...")
-    try:
-        campaign.main()
-    except Exception as e:
-        print(f"  -> ERROR: Failed to generate weekly campaign report: {e}")
-
-    # --- Generate Campaign Performance Report (GA) ---
-    print("\n[3/6] Generating Campaign Performance Report (GA)...")
-    try:
-        campaign_performance.main()
-    except Exception as e:
-        print(f"  -> ERROR: Failed to generate campaign performance report: {e}")
-
-    # --- Generate Landing Page Report (GA) ---
-    print("\n[4/6] Generating Landing Page Report (GA)...")
-    try:
-        landing_page.main()
-    except Exception as e:
-        print(f"  -> ERROR: Failed to generate landing page report: {e}")
+    # Create the shared GA client up front so every report reuses the same connection
+    ga_reporter.get_ga_client()
 
-    # --- Generate Form Fills Report (GA) ---
-    print("\n[5/6] Generating Form Fills Report (GA)...")
-    try:
-        formfills.main()
-    except Exception as e:
-        print(f"  -> ERROR: Failed to generate form fills report: {e}")
+    # Write the plotly.js bundle every report links to once, before the reports run
+    ga_reporter.write_plotly_js("reports")
 
-    # --- Generate Weekly Conversions Report (GA) ---
-    print("\n[6/6] Generating Weekly Conversions Report (GA)...")
-    try:
-        weekly_conversions.main()
-    except Exception as e:
-        print(f"  -> ERROR: Failed to generate weekly conversions report: {e}")
+    # Each report spends most of its time waiting on the GA API, so they run in
+    # parallel threads and overlap their requests.
+    with ThreadPoolExecutor(max_workers=len(REPORTS)) as executor:
+        futures = {executor.submit(run_report, module): label for label, module in REPORTS}
+        for future in as_completed(futures):
+            label = futures[future]
+            error = future.exception()
+            if error:
+                print(f"  -> ERROR: Failed to generate {label} report: {error}")
+            else:
+                print(f"  -> Finished {label} report.")
 
     end_time = time.time()
     print("-" * 40)
     print(f"All reports have been processed in {end_time - start_time:.2f} seconds.")
 
 
+def run_report(module):
+    """
+    Runs a report's main(), treating its early sys.exit() on empty data as a normal return.
+    """
+    try:
+        module.main()
+    except SystemExit:
+        pass
+
+
 if __name__ == "__main__":
     run_all()
\ No newline at end of file
@@ -52,10 +52,37 @@ def main():
         OrderBy(metric=OrderBy.MetricOrderBy(metric_name="keyEvents"), desc=True),
     ]
 
-    # Run the report
-    response = ga_reporter.run_ga_report(
-        client, PROPERTY_ID, dimensions, metrics, order_bys, date_ranges=overview_date_ranges
-    )
+    # --- Summary Date Ranges: last week and month-to-date ---
+    summary_start_date = end_date - timedelta(days=6)
+    summary_date_ranges = [
+        DateRange(start_date=summary_start_date.strftime('%Y-%m-%d'),
+                  end_date=end_date.strftime('%Y-%m-%d'))
+    ]
+    mtd_start_date = end_date.replace(day=1)
+    mtd_date_ranges = [
+        DateRange(start_date=mtd_start_date.strftime('%Y-%m-%d'),
+                  end_date=end_date.strftime('%Y-%m-%d'))
+    ]
+    summary_metrics = [
+        Metric(name="activeUsers"),
+        Metric(name="engagedSessions"),
+        Metric(name="keyEvents")
+    ]
+
+    requests = [
+        ga_reporter.build_report_request(
+            PROPERTY_ID, dimensions, metrics, order_bys, date_ranges=overview_date_ranges
+        ),
+        ga_reporter.build_report_request(
+            PROPERTY_ID, dimensions=[], metrics=summary_metrics, order_bys=[], date_ranges=summary_date_ranges
+        ),
+        ga_reporter.build_report_request(
+            PROPERTY_ID, dimensions=[], metrics=summary_metrics, order_bys=[], date_ranges=mtd_date_ranges
+        ),
+    ]
+
+    # Run the weekly report and both summaries in a single batch request
+    response, summary_response, mtd_response = ga_reporter.run_ga_batch(client, PROPERTY_ID, requests)
 
     # Process data into a weekly DataFrame
     df = ga_reporter.process_to_weekly_df(
@@ -82,64 +109,19 @@ def main():
     df_for_table.loc['Total'] = df_for_table.sum()
 
     # --- Create Stacked Bar Chart with Plotly ---
-    display_columns = [ga_reporter.format_week_header(d) for d in df_aggregated.columns]
+    display_columns = ga_reporter.format_week_headers(df_aggregated.columns)
     chart_html = create_chart(df_aggregated, display_columns)
 
-    # --- Fetch Summary Metrics for the last week ---
-    summary_start_date = end_date - timedelta(days=6)
-    summary_date_ranges = [
-        DateRange(start_date=summary_start_date.strftime('%Y-%m-%d'),
-                  end_date=end_date.strftime('%Y-%m-%d'))
-    ]
-    summary_metrics = [
-        Metric(name="activeUsers"),
-        Metric(name="engagedSessions"),
-        Metric(name="keyEvents")
-    ]
-
-    summary_response = ga_reporter.run_ga_report(
-        client,
-        PROPERTY_ID,
-        dimensions=[],
-        metrics=summary_metrics,
-        order_bys=[],
-        date_ranges=summary_date_ranges
-    )
-
-    summary_stats = {"active_users": 0, "engaged_sessions": 0, "key_events": 0}
-    if summary_response.rows:
-        summary_stats["active_users"] = int(summary_response.rows[0].metric_values[0].value)
-        summary_stats["engaged_sessions"] = int(summary_response.rows[0].metric_values[1].value)
-        summary_stats["key_events"] = int(summary_response.rows[0].metric_values[2].value)
-
-    # --- Fetch MTD Summary Metrics ---
-    mtd_start_date = end_date.replace(day=1)
-    mtd_date_ranges = [
-        DateRange(start_date=mtd_start_date.strftime('%Y-%m-%d'),
-                  end_date=end_date.strftime('%Y-%m-%d'))
-    ]
-    mtd_metrics = [
-        Metric(name="activeUsers"),
-        Metric(name="engagedSessions"),
-        Metric(name="keyEvents")
-    ]
-
-    mtd_response = ga_reporter.run_ga_report(
-        client,
-        PROPERTY_ID,
-        dimensions=[],
-        metrics=mtd_metrics,
-        order_bys=[],
-        date_ranges=mtd_date_ranges
-    )
-
-    summary_stats["mtd_active_users"] = 0
-    summary_stats["mtd_engaged_sessions"] = 0
-    summary_stats["mtd_key_events"] = 0
-    if mtd_response.rows:
-        summary_stats["mtd_active_users"] = int(mtd_response.rows[0].metric_values[0].value)
-        summary_stats["mtd_engaged_sessions"] = int(mtd_response.rows[0].metric_values[1].value)
-        summary_stats["mtd_key_events"] = int(mtd_response.rows[0].metric_values[2].value)
+    # --- Summary Metrics for the last week and MTD ---
+    summary_stats = {}
+    for prefix, stats_response in (("", summary_response), ("mtd_", mtd_response)):
+        summary_stats[f"{prefix}active_users"] = 0
+        summary_stats[f"{prefix}engaged_sessions"] = 0
+        summary_stats[f"{prefix}key_events"] = 0
+        if stats_response.rows:
+            summary_stats[f"{prefix}active_users"] = int(stats_response.rows[0].metric_values[0].value)
+            summary_stats[f"{prefix}engaged_sessions"] = int(stats_response.rows[0].metric_values[1].value)
+            summary_stats[f"{prefix}key_events"] = int(stats_response.rows[0].metric_values[2].value)
 
     # --- Generate and save the final HTML file ---
     generate_html_report(
@@ -184,7 +166,7 @@ def create_chart(df_chart, display_columns):
             orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0
         )
     )
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
 def aggregate_campaigns(df, top_n):
     """Groups smaller campaigns into an 'Other' category."""
@@ -214,23 +196,13 @@ def aggregate_campaigns(df, top_n):
 
 def generate_html_report(df_for_table, chart_html, report_title, output_path, start_date, end_date, summary_stats):
     """Generates and saves the final HTML report file for the weekly conversions."""
-    # Format the DataFrame for the HTML table (add comma separators)
-    df_display = df_for_table.copy()
-    for col in df_display.columns:
-        df_display[col] = df_display[col].apply(lambda x: f"{x:,.0f}")
-
     # Create formatted column headers for display, handling the 'Total' column
-    display_columns = [
-        ga_reporter.format_week_header(col) if isinstance(col, date) else col
-        for col in df_for_table.columns
-    ]
-    df_display.columns = display_columns
+    week_columns = [col for col in df_for_table.columns if isinstance(col, date)]
+    week_headers = dict(zip(week_columns, ga_reporter.format_week_headers(week_columns)))
+    display_columns = [week_headers.get(col, col) for col in df_for_table.columns]
 
-    table_html = df_display.to_html(classes='styled-table')
-    table_html = table_html.replace(
-        '<tr>\n      <th>Total</th>',
-        '<tr class="total-row">\n      <th>Total</th>'
-    )
+    # Render the table with the 'Total' row marked for styling
+    table_html = ga_reporter.render_table(df_for_table, display_columns)
 
     date_range_header = ""
     if start_date and end_date:
@@ -257,27 +229,31 @@ def generate_html_report(df_for_table, chart_html, report_title, output_path, st
     </div>
     """
 
-    html_template = f"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    ga_reporter.write_plotly_js(output_dir)
+
+    # Write the document piece by piece rather than assembling it in memory first
+    with open(output_path, "w") as f:
+        f.write(f"""
 <html>
 <head>
     <title>{report_title}</title>
     <link rel="stylesheet" href="styles.css">
+    {ga_reporter.PLOTLY_JS_TAG}
 </head>
 <body>
     <h1>{report_title}</h1>
     {date_range_header}
     {chart_html}
-    {table_html}
-    {summary_html}
+    """)
+        f.write(table_html)
+        f.write(summary_html)
+        f.write("""
 </body>
 </html>
-"""
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
-    with open(output_path, "w") as f:
-        f.write(html_template)
+""")
 
     print(f"Report successfully generated: {output_path}")
 